@@ -6,40 +6,124 @@ Modern Python-based cloud deployment automation replacing shell scripts
 
 import os
 import sys
-import json
 import logging
 import argparse
+import asyncio
+import threading
+import secrets
+import string
+import importlib.util
 from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass
+from functools import cached_property
 
 try:
-    from google.cloud import secretmanager
-    from google.cloud import storage
-    from google.cloud import sql_v1
-    from google.cloud import run_v2
-    from google.cloud import build_v1
-    from google.auth import default
-    import google.auth.exceptions
+    import orjson as _json
 except ImportError:
-    print("❌ Google Cloud SDK not installed. Install with:")
-    print("   pip install google-cloud-secret-manager google-cloud-storage google-cloud-sql google-cloud-run google-cloud-build")
-    sys.exit(1)
+    import json as _json
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-@dataclass
+def _configure_logging() -> None:
+    """Emit one JSON object per line so Cloud Logging indexes the fields"""
+    try:
+        from pythonjsonlogger.json import JsonFormatter
+    except ImportError:
+        # python-json-logger < 3.1
+        from pythonjsonlogger.jsonlogger import JsonFormatter
+    
+    # The handler sits on the root so library records (e.g. backoff retries) share it
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter(
+        "%(asctime)s %(levelname)s %(name)s %(message)s",
+        json_ensure_ascii=False
+    ))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+_GCP_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+# Keep channels warm across the long Cloud Build wait instead of reconnecting
+_GRPC_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+]
+
+# Modules the GCP actions rely on, mapped to the package that provides them;
+# imported lazily so --help works without them
+_REQUIRED_MODULES = {
+    "google.auth": "google-auth",
+    "google.api_core": "google-api-core",
+    "google.cloud.secretmanager": "google-cloud-secret-manager",
+    "google.cloud.storage": "google-cloud-storage",
+    "google.cloud.sqladmin_v1": "google-cloud-sql",
+    "google.cloud.run_v2": "google-cloud-run",
+    "google.cloud.devtools.cloudbuild_v1": "google-cloud-build",
+    "backoff": "backoff",
+    "cachetools": "cachetools",
+    "pythonjsonlogger": "python-json-logger",
+}
+
+def _require_sdk() -> None:
+    """Exit with install instructions if deployment dependencies are missing"""
+    missing = []
+    for module, package in _REQUIRED_MODULES.items():
+        try:
+            found = importlib.util.find_spec(module) is not None
+        except ModuleNotFoundError:
+            found = False
+        if not found and package not in missing:
+            missing.append(package)
+    
+    if missing:
+        print("❌ Deployment dependencies not installed. Install with:")
+        print(f"   pip install {' '.join(missing)}")
+        sys.exit(1)
+
+def _is_transient(exc: Exception) -> bool:
+    """Control-plane blips worth retrying; anything else surfaces immediately"""
+    from google.api_core.exceptions import Aborted, DeadlineExceeded, ServiceUnavailable
+    return isinstance(exc, (ServiceUnavailable, DeadlineExceeded, Aborted))
+
+def _retry_transient(func):
+    """Wrap func so transient errors are retried with jittered exponential backoff"""
+    import backoff
+    return backoff.on_exception(
+        backoff.expo,
+        Exception,
+        giveup=lambda e: not _is_transient(e),
+        max_tries=5,
+        jitter=backoff.full_jitter
+    )(func)
+
+def _json_dumps(obj) -> str:
+    """Serialize to a JSON string, using orjson when it is installed"""
+    data = _json.dumps(obj)
+    return data.decode() if isinstance(data, bytes) else data
+
+_PW_ALPHABET = (string.ascii_letters + string.digits + "!@#$%^&*").encode()
+# Largest multiple of the alphabet size that fits in a byte; higher bytes are
+# rejected so every character stays equally likely
+_PW_BYTE_LIMIT = 256 - 256 % len(_PW_ALPHABET)
+
+def _generate_password(length: int) -> str:
+    """Generate secure random password"""
+    chars = bytearray()
+    while len(chars) < length:
+        for b in secrets.token_bytes(length):
+            if b < _PW_BYTE_LIMIT:
+                chars.append(_PW_ALPHABET[b % len(_PW_ALPHABET)])
+    return chars[:length].decode()
+
+# Name Terraform gives the instance: ${project_name}-${environment}-db
+DEFAULT_DB_INSTANCE = "qitlalli-prod-db"
+
+@dataclass(slots=True, frozen=True)
 class GCPConfig:
     """GCP deployment configuration"""
     project_id: str
     region: str = "us-central1"
     service_name: str = "qitlalli-odoo"
-    db_instance_name: str = "qitlalli-db"
+    db_instance_name: str = DEFAULT_DB_INSTANCE
     service_account: str = "qitlalli-service-account"
 
 class GCPDeploymentManager:
@@ -47,24 +131,128 @@ class GCPDeploymentManager:
     
     def __init__(self, config: GCPConfig):
         self.config = config
-        self.credentials, self.project = default()
+        from google.auth import default
+        # Explicit scope so service-account keys can refresh; without one the token
+        # endpoint rejects the request with invalid_scope
+        self.credentials, self.project = default(scopes=_GCP_SCOPES)
         
-        # Initialize clients
-        self.secret_client = secretmanager.SecretManagerServiceClient()
-        self.storage_client = storage.Client()
-        self.sql_client = sql_v1.SqlInstancesServiceClient()
-        self.run_client = run_v2.ServicesClient()
-        self.build_client = build_v1.CloudBuildClient()
+        from cachetools import TTLCache
         
+        # Secret values read during this run, keyed by secret name
+        self._secret_cache = TTLCache(maxsize=128, ttl=300)
+        self._secret_lock = threading.Lock()
+        
+        # Canonical Cloud Run URL, looked up once per run
+        self._service_url: Optional[str] = None
+        
+    # Clients are built on first use so each action only opens the channels it needs.
+    # Async clients only live for one event loop; see run().
+    # gRPC clients get one explicitly created channel each, authenticated with the
+    # credentials loaded above instead of re-resolving them per client.
+    
+    def _grpc_transport(self, transport_cls, host: str):
+        channel = transport_cls.create_channel(
+            host,
+            credentials=self.credentials,
+            options=_GRPC_CHANNEL_OPTIONS
+        )
+        return transport_cls(channel=channel)
+    
+    @cached_property
+    def secret_client(self):
+        from google.cloud import secretmanager
+        from google.cloud.secretmanager_v1.services.secret_manager_service.transports import (
+            SecretManagerServiceGrpcTransport,
+        )
+        return secretmanager.SecretManagerServiceClient(
+            transport=self._grpc_transport(SecretManagerServiceGrpcTransport, "secretmanager.googleapis.com")
+        )
+    
+    @cached_property
+    def secret_async_client(self):
+        from google.cloud import secretmanager
+        from google.cloud.secretmanager_v1.services.secret_manager_service.transports import (
+            SecretManagerServiceGrpcAsyncIOTransport,
+        )
+        return secretmanager.SecretManagerServiceAsyncClient(
+            transport=self._grpc_transport(SecretManagerServiceGrpcAsyncIOTransport, "secretmanager.googleapis.com")
+        )
+    
+    async def _close_async_clients(self) -> None:
+        # grpc.aio channels belong to the loop that created them, so drop them with it
+        for name in ("secret_async_client", "sql_async_client"):
+            client = self.__dict__.pop(name, None)
+            if client is not None:
+                await client.transport.close()
+    
+    def run(self, coro):
+        """Run a coroutine on a fresh event loop, closing loop-bound clients afterwards"""
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await self._close_async_clients()
+        return asyncio.run(runner())
+    
+    @cached_property
+    def storage_client(self):
+        from google.cloud import storage
+        return storage.Client(project=self.config.project_id, credentials=self.credentials)
+    
+    @cached_property
+    def sql_client(self):
+        from google.cloud import sqladmin_v1
+        from google.cloud.sqladmin_v1.services.sql_instances_service.transports import (
+            SqlInstancesServiceGrpcTransport,
+        )
+        return sqladmin_v1.SqlInstancesServiceClient(
+            transport=self._grpc_transport(SqlInstancesServiceGrpcTransport, "sqladmin.googleapis.com")
+        )
+    
+    @cached_property
+    def sql_async_client(self):
+        from google.cloud import sqladmin_v1
+        from google.cloud.sqladmin_v1.services.sql_instances_service.transports import (
+            SqlInstancesServiceGrpcAsyncIOTransport,
+        )
+        return sqladmin_v1.SqlInstancesServiceAsyncClient(
+            transport=self._grpc_transport(SqlInstancesServiceGrpcAsyncIOTransport, "sqladmin.googleapis.com")
+        )
+    
+    @cached_property
+    def run_client(self):
+        from google.cloud import run_v2
+        from google.cloud.run_v2.services.services.transports import ServicesGrpcTransport
+        return run_v2.ServicesClient(
+            transport=self._grpc_transport(ServicesGrpcTransport, "run.googleapis.com")
+        )
+    
+    @cached_property
+    def build_client(self):
+        from google.cloud.devtools import cloudbuild_v1
+        from google.cloud.devtools.cloudbuild_v1.services.cloud_build.transports import (
+            CloudBuildGrpcTransport,
+        )
+        return cloudbuild_v1.CloudBuildClient(
+            transport=self._grpc_transport(CloudBuildGrpcTransport, "cloudbuild.googleapis.com")
+        )
+    
     def check_authentication(self) -> bool:
         """Verify GCP authentication"""
+        import google.auth.exceptions
+        
         try:
-            # Test authentication by listing projects
-            from google.cloud import resourcemanager
-            client = resourcemanager.Client()
-            list(client.list_projects())
+            # A token refresh proves the credentials work without listing projects
+            from google.auth.transport.requests import Request
+            self.credentials.refresh(Request())
+            if not self.credentials.valid:
+                logger.error("❌ GCP credentials are not valid after refresh")
+                return False
             logger.info("✅ GCP authentication verified")
             return True
+        except google.auth.exceptions.RefreshError as e:
+            logger.error(f"❌ Could not refresh GCP credentials: {e}. Run: gcloud auth login")
+            return False
         except google.auth.exceptions.DefaultCredentialsError:
             logger.error("❌ Not authenticated with Google Cloud. Run: gcloud auth login")
             return False
@@ -72,78 +260,136 @@ class GCPDeploymentManager:
             logger.error(f"❌ Authentication check failed: {e}")
             return False
     
-    def create_secrets(self) -> Dict[str, str]:
-        """Create all required secrets in Secret Manager"""
-        import secrets
-        import string
-        
-        secrets_config = {
-            "qitlalli-db-password": self._generate_password(32),
-            "qitlalli-admin-password": self._generate_password(24), 
-            "qitlalli-jwt-secret": self._generate_password(64),
+    @cached_property
+    def _desired_secrets(self) -> Dict[str, str]:
+        """Secret values to provision, generated once so retries reuse the same passwords"""
+        return {
+            "qitlalli-db-password": _generate_password(32),
+            "qitlalli-admin-password": _generate_password(24), 
+            "qitlalli-jwt-secret": _generate_password(64),
             "qitlalli-email-password": "PLACEHOLDER-UPDATE-MANUALLY",
             "qitlalli-whatsapp-token": "PLACEHOLDER-UPDATE-MANUALLY"
         }
+    
+    def create_secrets(self) -> Dict[str, str]:
+        """Create all required secrets in Secret Manager"""
+        return self.run(self.create_secrets_async())
+    
+    async def create_secrets_async(self, max_workers: int = 8) -> Dict[str, str]:
+        """Create all required secrets in Secret Manager concurrently"""
+        secrets_config = self._desired_secrets
         
-        created_secrets = {}
+        # One list_secrets call replaces a get_secret probe per secret
+        parent = f"projects/{self.config.project_id}"
+        pager = await _retry_transient(self.secret_async_client.list_secrets)(
+            request={"parent": parent}
+        )
+        existing_ids = {secret.name.rsplit("/", 1)[-1] async for secret in pager}
         
+        missing = {}
         for secret_name, secret_value in secrets_config.items():
-            try:
-                # Create secret if it doesn't exist
-                parent = f"projects/{self.config.project_id}"
-                secret_id = secret_name
-                
-                try:
-                    # Check if secret exists
-                    secret_path = self.secret_client.secret_path(self.config.project_id, secret_id)
-                    self.secret_client.get_secret(request={"name": secret_path})
-                    logger.info(f"✅ Secret {secret_name} already exists")
-                except:
-                    # Secret doesn't exist, create it
-                    secret = {
-                        "replication": {
-                            "automatic": {}
-                        }
-                    }
-                    
-                    response = self.secret_client.create_secret(
-                        request={
-                            "parent": parent,
-                            "secret_id": secret_id,
-                            "secret": secret
-                        }
-                    )
-                    
-                    # Add secret version
-                    self.secret_client.add_secret_version(
-                        request={
-                            "parent": response.name,
-                            "payload": {"data": secret_value.encode()}
-                        }
-                    )
-                    
-                    logger.info(f"✅ Created secret: {secret_name}")
-                    created_secrets[secret_name] = secret_value
-                    
-            except Exception as e:
-                logger.error(f"❌ Failed to create secret {secret_name}: {e}")
+            if secret_name in existing_ids:
+                logger.info(f"✅ Secret {secret_name} already exists", extra={"secret_id": secret_name})
+            else:
+                missing[secret_name] = secret_value
+        
+        # Fan out one coroutine per missing secret, at most max_workers in flight;
+        # a single failure must not cancel the batch
+        limit = asyncio.Semaphore(max_workers)
+        
+        async def ensure_limited(name: str, value: str) -> bool:
+            async with limit:
+                return await self._ensure_secret(name, value)
+        
+        results = await asyncio.gather(
+            *(ensure_limited(name, value) for name, value in missing.items()),
+            return_exceptions=True
+        )
+        
+        created_secrets = {}
+        
+        for secret_name, result in zip(missing, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Failed to create secret {secret_name}: {result}", extra={"secret_id": secret_name})
+            elif result:
+                created_secrets[secret_name] = missing[secret_name]
                 
         return created_secrets
     
-    def _generate_password(self, length: int) -> str:
-        """Generate secure random password"""
-        import secrets
-        import string
+    async def _ensure_secret(self, secret_name: str, secret_value: str) -> bool:
+        """Create a secret and its first version"""
+        from google.api_core.exceptions import AlreadyExists
+        
+        parent = f"projects/{self.config.project_id}"
+        secret_id = secret_name
+        
+        secret = {
+            "replication": {
+                "automatic": {}
+            }
+        }
+        
+        try:
+            response = await _retry_transient(self.secret_async_client.create_secret)(
+                request={
+                    "parent": parent,
+                    "secret_id": secret_id,
+                    "secret": secret
+                }
+            )
+            secret_path = response.name
+        except AlreadyExists:
+            # Either created by someone else since list_secrets ran, or by an earlier
+            # attempt whose response was lost; only the latter still lacks a version
+            secret_path = self.secret_async_client.secret_path(self.config.project_id, secret_id)
+            if await self._has_versions(secret_path):
+                logger.info(f"✅ Secret {secret_name} already exists", extra={"secret_id": secret_name})
+                return False
+        
+        # Add secret version; a retried duplicate carries the same plaintext
+        await _retry_transient(self.secret_async_client.add_secret_version)(
+            request={
+                "parent": secret_path,
+                "payload": {"data": secret_value.encode()}
+            }
+        )
+        
+        logger.info(f"✅ Created secret: {secret_name}", extra={"secret_id": secret_name})
+        return True
+    
+    async def _has_versions(self, secret_path: str) -> bool:
+        """Check whether a secret has at least one version"""
+        pager = await _retry_transient(self.secret_async_client.list_secret_versions)(
+            request={"parent": secret_path, "page_size": 1}
+        )
+        async for _ in pager:
+            return True
+        return False
+    
+    def get_secret_value(self, secret_name: str) -> str:
+        """Read the latest version of a secret, memoized for the cache TTL"""
+        with self._secret_lock:
+            if secret_name in self._secret_cache:
+                return self._secret_cache[secret_name]
         
-        alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
-        return ''.join(secrets.choice(alphabet) for _ in range(length))
+        # Lock is released around the RPC so concurrent readers don't queue on network latency
+        version_path = self.secret_client.secret_version_path(
+            self.config.project_id, secret_name, "latest"
+        )
+        response = self.secret_client.access_secret_version(request={"name": version_path})
+        value = response.payload.data.decode()
+        
+        with self._secret_lock:
+            self._secret_cache[secret_name] = value
+        return value
     
     def setup_service_account(self) -> bool:
+        """Create and configure service account with proper IAM roles"""
+        return self.run(self.setup_service_account_async())
+    
+    async def setup_service_account_async(self) -> bool:
         """Create and configure service account with proper IAM roles"""
         try:
-            from google.cloud import iam
-            from google.cloud import resourcemanager
-            
             # TODO: Implement service account creation
             # This would replace the complex gcloud commands in shell script
             
@@ -162,7 +408,32 @@ class GCPDeploymentManager:
             logger.error(f"❌ Service account setup failed: {e}")
             return False
     
+    def ensure_sql_instance(self) -> bool:
+        """Verify the Cloud SQL instance exists"""
+        return self.run(self.ensure_sql_instance_async())
+    
+    async def ensure_sql_instance_async(self) -> bool:
+        """Verify the Cloud SQL instance exists"""
+        from google.api_core.exceptions import NotFound
+        
+        try:
+            await _retry_transient(self.sql_async_client.get)(
+                request={
+                    "project": self.config.project_id,
+                    "instance": self.config.db_instance_name
+                }
+            )
+            logger.info(f"✅ Cloud SQL instance {self.config.db_instance_name} exists")
+            return True
+        except NotFound:
+            logger.warning(f"⚠️ Cloud SQL instance {self.config.db_instance_name} not found")
+            return False
+    
     def build_and_deploy(self) -> bool:
+        """Build Docker image and deploy to Cloud Run"""
+        return self.run(self.build_and_deploy_async())
+    
+    async def build_and_deploy_async(self, build_timeout: int = 1800) -> bool:
         """Build Docker image and deploy to Cloud Run"""
         try:
             # Build Docker image using Cloud Build
@@ -186,14 +457,45 @@ class GCPDeploymentManager:
             }
             
             logger.info("🐳 Starting Docker build...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Build config: {_json_dumps(build_config)}")
             
-            # Submit build
+            # Submit build; not retried, a lost response may still have created the build
             parent = f"projects/{self.config.project_id}"
-            operation = self.build_client.create_build(
+            operation = await asyncio.to_thread(
+                self.build_client.create_build,
                 request={"parent": parent, "build": build_config}
             )
             
             logger.info("✅ Docker build submitted successfully")
+            logger.info(
+                f"📜 Build logs: {operation.metadata.build.log_url}",
+                extra={"build_log_url": operation.metadata.build.log_url}
+            )
+            
+            # Polling the operation is read-only, so transient errors there are retried
+            wait_for_build = _retry_transient(operation.result)
+            
+            # IAM and secrets don't depend on the image, so prepare them while the build runs
+            build_result, service_account_ok, created = await asyncio.gather(
+                asyncio.to_thread(wait_for_build, timeout=build_timeout),
+                self.setup_service_account_async(),
+                self.create_secrets_async(),
+                return_exceptions=True
+            )
+            
+            if isinstance(build_result, Exception):
+                logger.error(f"❌ Docker build failed: {build_result}")
+                return False
+            logger.info("✅ Docker build completed")
+            
+            if service_account_ok is not True:
+                logger.error("❌ Service account setup failed")
+                return False
+            if isinstance(created, Exception):
+                logger.error(f"❌ Secret provisioning failed: {created}")
+                return False
+            logger.info(f"✅ Created {len(created)} secrets")
             
             # TODO: Deploy to Cloud Run
             # This would replace the complex Cloud Run deployment logic
@@ -202,57 +504,149 @@ class GCPDeploymentManager:
             
         except Exception as e:
             logger.error(f"❌ Build and deployment failed: {e}")
-            return False
+            raise
     
     def get_service_url(self) -> Optional[str]:
         """Get the deployed service URL"""
+        from google.api_core.exceptions import NotFound
+        
+        if self._service_url:
+            return self._service_url
+        
         try:
-            # TODO: Implement Cloud Run service URL retrieval
-            service_url = f"https://{self.config.service_name}-{self.config.project_id}.run.app"
-            return service_url
+            name = (
+                f"projects/{self.config.project_id}/locations/{self.config.region}"
+                f"/services/{self.config.service_name}"
+            )
+            service = self.run_client.get_service(name=name)
+            self._service_url = service.uri
+            return self._service_url
+        except NotFound:
+            logger.error(f"❌ Cloud Run service {self.config.service_name} not found in {self.config.region}")
+            return None
         except Exception as e:
             logger.error(f"❌ Failed to get service URL: {e}")
             return None
     
-    def run_health_check(self, service_url: str) -> bool:
+    def run_health_check(self, service_url: str, max_wait: int = 120) -> bool:
+        """Run smoke tests on deployed service"""
+        return self.run(self.run_health_check_async(service_url, max_wait))
+    
+    async def run_health_check_async(self, service_url: str, max_wait: int = 120) -> bool:
         """Run smoke tests on deployed service"""
-        import requests
-        import time
+        import aiohttp
         
-        try:
-            # Wait for service to be ready
-            logger.info("⏳ Waiting for service to be ready...")
-            time.sleep(30)
-            
-            # Test health endpoint
-            health_url = f"{service_url}/web/health"
-            response = requests.get(health_url, timeout=30)
+        health_url = f"{service_url}/web/health"
+        logger.info("⏳ Waiting for service to be ready...")
+        
+        # Poll with exponential backoff until healthy or the wait budget runs out
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+        delay = 1
+        last_error = None
+        listening = False
+        
+        # One session for every attempt so polls reuse the same TLS connection
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                try:
+                    # Cheap HEAD until the container accepts connections, then GET the health path
+                    if not listening:
+                        async with session.head(service_url):
+                            listening = True
+                    
+                    async with session.get(health_url) as response:
+                        if response.status == 200:
+                            logger.info("✅ Health check passed")
+                            return True
+                        last_error = f"HTTP {response.status}"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    last_error = str(e) or "request timed out"
+                
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, 10)
+        
+        logger.error(f"❌ Health check failed: {last_error}")
+        return False
+
+async def orchestrate(manager: GCPDeploymentManager, action: str) -> None:
+    """Run the requested action, overlapping independent steps"""
+    if action == "setup":
+        # Complete environment setup
+        logger.info("🔧 Setting up GCP environment...")
+        
+        # Service account, secrets and SQL check don't depend on each other; collect
+        # every outcome so one failure can't cancel secret provisioning mid-write
+        service_account_ok, created, sql_ok = await asyncio.gather(
+            manager.setup_service_account_async(),
+            manager.create_secrets_async(),
+            manager.ensure_sql_instance_async(),
+            return_exceptions=True
+        )
+        
+        if isinstance(created, Exception):
+            raise Exception(f"Secret provisioning failed: {created}")
+        logger.info(f"✅ Created {len(created)} secrets")
+        
+        # The instance may not exist yet on a fresh project, so this is informational
+        if isinstance(sql_ok, Exception):
+            logger.warning(f"⚠️ Cloud SQL instance check failed: {sql_ok}")
+        elif not sql_ok:
+            logger.warning("⚠️ Cloud SQL instance not provisioned yet; run terraform apply")
+        
+        if service_account_ok is not True:
+            raise Exception("Service account setup failed")
+        
+    elif action == "secrets":
+        # Just create secrets
+        created = await manager.create_secrets_async()
+        logger.info(f"✅ Managed {len(created)} secrets")
+        
+    elif action == "deploy":
+        # Full deployment
+        logger.info("🚀 Starting deployment...")
+        
+        # Build and deploy
+        if not await manager.build_and_deploy_async():
+            raise Exception("Build and deployment failed")
+        
+        # Get service URL
+        service_url = manager.get_service_url()
+        if service_url:
+            logger.info(f"🌐 Service URL: {service_url}", extra={"service_url": service_url})
             
-            if response.status_code == 200:
-                logger.info("✅ Health check passed")
-                return True
+            # Run health check
+            if await manager.run_health_check_async(service_url):
+                logger.info("🎉 Deployment completed successfully!")
             else:
-                logger.error(f"❌ Health check failed: HTTP {response.status_code}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"❌ Health check failed: {e}")
-            return False
+                logger.warning("⚠️ Deployment completed but health check failed")
 
 def main():
     """Main deployment orchestration"""
     parser = argparse.ArgumentParser(description="QiTlalli GCP Deployment Manager")
     parser.add_argument("--project-id", required=True, help="GCP Project ID")
     parser.add_argument("--region", default="us-central1", help="GCP Region")
+    parser.add_argument("--db-instance", default=DEFAULT_DB_INSTANCE,
+                       help="Cloud SQL instance name")
     parser.add_argument("--action", choices=["setup", "deploy", "secrets"], 
                        default="deploy", help="Action to perform")
+    parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
     
     args = parser.parse_args()
+    _require_sdk()
+    _configure_logging()
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
     
     # Initialize deployment manager
     config = GCPConfig(
         project_id=args.project_id,
-        region=args.region
+        region=args.region,
+        db_instance_name=args.db_instance
     )
     
     manager = GCPDeploymentManager(config)
@@ -264,42 +658,7 @@ def main():
     logger.info(f"🚀 Starting QiTlalli {args.action} for project: {config.project_id}")
     
     try:
-        if args.action == "setup":
-            # Complete environment setup
-            logger.info("🔧 Setting up GCP environment...")
-            
-            # Create service account
-            if not manager.setup_service_account():
-                raise Exception("Service account setup failed")
-            
-            # Create secrets
-            secrets = manager.create_secrets()
-            logger.info(f"✅ Created {len(secrets)} secrets")
-            
-        elif args.action == "secrets":
-            # Just create secrets
-            secrets = manager.create_secrets()
-            logger.info(f"✅ Managed {len(secrets)} secrets")
-            
-        elif args.action == "deploy":
-            # Full deployment
-            logger.info("🚀 Starting deployment...")
-            
-            # Build and deploy
-            if not manager.build_and_deploy():
-                raise Exception("Build and deployment failed")
-            
-            # Get service URL
-            service_url = manager.get_service_url()
-            if service_url:
-                logger.info(f"🌐 Service URL: {service_url}")
-                
-                # Run health check
-                if manager.run_health_check(service_url):
-                    logger.info("🎉 Deployment completed successfully!")
-                else:
-                    logger.warning("⚠️ Deployment completed but health check failed")
-            
+        manager.run(orchestrate(manager, args.action))
     except Exception as e:
         logger.error(f"❌ Deployment failed: {e}")
         sys.exit(1)